@@ -1,20 +1,85 @@
 import discord
-from discord.ext import commands
+from discord import app_commands
 import aiohttp
+import aiosqlite
 import asyncio
+import json
 import os
+import re
+import socket
+import time
+from collections import OrderedDict
+from urllib.parse import quote
 from dotenv import load_dotenv
 from datetime import datetime
+from typing import Literal, Optional
 import logging
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import aiodns
+except ImportError:
+    aiodns = None
+
+try:
+    from prometheus_client import Histogram, start_http_server
+except ImportError:
+    Histogram = None
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 load_dotenv()
 
+CACHE_SIZE = 256
+MAX_RESPONSE_SIZE = 1_000_000
+MUSICBRAINZ_INTERVAL = 1.0
+PARTIAL_EMBED_TTL = 300
+TRACK_TTL = 86400
+MAX_AGE_RE = re.compile(r'max-age=(\d+)')
+FEAT_RE = re.compile(r'\s+(?:ft\.|feat\.).*', re.IGNORECASE | re.DOTALL)
+PAREN_RE = re.compile(r'\s*\(.*', re.DOTALL)
+LYRICS_BLOCK = "```\n{}\n```"
+_EMPTY_CREDIT = ({'name': 'Unknown Artist'},)
+
+REQUEST_LATENCY = Histogram(
+    'karaoke_api_request_seconds',
+    'Latency of upstream music API requests',
+    ['host']
+) if Histogram else None
+
+async def _trace_request_start(session, context, params):
+    context.start = asyncio.get_running_loop().time()
+
+async def _trace_request_end(session, context, params):
+    elapsed = asyncio.get_running_loop().time() - context.start
+    REQUEST_LATENCY.labels(params.url.host).observe(elapsed)
+
 intents = discord.Intents.default()
-intents.message_content = True
-bot = commands.Bot(command_prefix='/', intents=intents)
+intents.messages = False
+
+class KaraokeBot(discord.Client):
+    def __init__(self, **options):
+        super().__init__(**options)
+        self.tree = app_commands.CommandTree(self)
+
+    async def setup_hook(self):
+        await music_api.setup()
+        await playlist_store.setup()
+        # Syncing is a rate-limited global upsert; only do it when commands change.
+        if os.getenv('SYNC_COMMANDS'):
+            await self.tree.sync()
+
+    async def close(self):
+        await music_api.close_session()
+        await playlist_store.close()
+        await super().close()
+
+bot = KaraokeBot(intents=intents)
 
 class MusicAPI:
     def __init__(self):
@@ -24,36 +89,124 @@ class MusicAPI:
         self.trending_url = "https://api.deezer.com/editorial/0/charts"
         self.lastfm_url = "http://ws.audioscrobbler.com/2.0/"
         self.session = None
+        self._connector = None
+        self._inflight = {}
+        self._cache = OrderedDict()
+        self._max_age = dict.fromkeys((self.trending_url, self.lastfm_url))
+        self._json_loads = orjson.loads if orjson else json.loads
+        self._musicbrainz_next = 0.0
         self.timeout = aiohttp.ClientTimeout(total=10)
+        self._trace_configs = []
+        if REQUEST_LATENCY:
+            trace_config = aiohttp.TraceConfig()
+            trace_config.on_request_start.append(_trace_request_start)
+            trace_config.on_request_end.append(_trace_request_end)
+            trace_config.on_request_exception.append(_trace_request_end)
+            self._trace_configs.append(trace_config)
 
-    async def create_session(self):
-        if not self.session or self.session.closed:
-            connector = aiohttp.TCPConnector(force_close=True, enable_cleanup_closed=True)
-            self.session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+    async def setup(self):
+        if self.session and not self.session.closed:
+            return
+        self._connector = aiohttp.TCPConnector(
+            limit=100,
+            limit_per_host=20,
+            ttl_dns_cache=300,
+            keepalive_timeout=75,
+            family=socket.AF_INET,
+            resolver=aiohttp.AsyncResolver() if aiodns else None
+        )
+        self.session = aiohttp.ClientSession(
+            connector=self._connector,
+            timeout=self.timeout,
+            trace_configs=self._trace_configs
+        )
 
     async def close_session(self):
         if self.session and not self.session.closed:
             await self.session.close()
 
     async def fetch_json(self, url, params=None):
-        await self.create_session()
+        key = (url, tuple(sorted((params or {}).items())))
+        while key in self._inflight:
+            pending = self._inflight[key]
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                # Only retry when the request we joined was cancelled, not us.
+                if not pending.cancelled():
+                    raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            data = await self._request_json(url, params)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(data)
+            return data
+        finally:
+            del self._inflight[key]
+
+    async def _request_json(self, url, params=None):
+        assert self.session is not None, "MusicAPI.setup() has not run"
+        if url.startswith(self.base_url):
+            await self._throttle_musicbrainz()
         try:
             async with self.session.get(url, params=params) as response:
                 if response.status == 200:
-                    return await response.json()
+                    if response.content_length and response.content_length > MAX_RESPONSE_SIZE:
+                        logger.error("Response too large: %s - %s bytes", url, response.content_length)
+                        return None
+                    match = MAX_AGE_RE.search(response.headers.get('Cache-Control', ''))
+                    if match and url in self._max_age:
+                        self._max_age[url] = int(match.group(1))
+                    return self._json_loads(await response.read())
                 else:
-                    logger.error(f"API request failed: {url} - Status: {response.status}")
+                    logger.error("API request failed: %s - Status: %s", url, response.status)
                     return None
         except asyncio.TimeoutError:
-            logger.error(f"Timeout while accessing: {url}")
+            logger.error("Timeout while accessing: %s", url)
             return None
         except Exception as e:
-            logger.error(f"Error in fetch_json: {str(e)}")
+            logger.error("Error in fetch_json: %s", e)
             return None
 
+    async def _throttle_musicbrainz(self):
+        # MusicBrainz allows one request per second per client: give each
+        # request its own start slot rather than holding a lock across it.
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        start = max(now, self._musicbrainz_next)
+        self._musicbrainz_next = start + MUSICBRAINZ_INTERVAL
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    async def _cached(self, key, ttl, coro_factory):
+        entry = self._cache.get(key)
+        if entry and time.monotonic() - entry[0] < ttl:
+            self._cache.move_to_end(key)
+            return entry[1]
+
+        value = await coro_factory()
+        if value is not None:
+            self._cache[key] = (time.monotonic(), value)
+            self._cache.move_to_end(key)
+            if len(self._cache) > CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return value
+
+    def _ttl(self, url, default):
+        max_age = self._max_age.get(url)
+        return default if max_age is None else max_age
+
     async def get_lyrics(self, artist, title):
-        url = f"{self.lyrics_url}{artist}/{title}"
-        logger.info(f"Fetching lyrics from: {url}")
+        url = f"{self.lyrics_url}{quote(artist, safe='')}/{quote(title, safe='')}"
+        logger.info("Fetching lyrics from: %s", url)
         
         data = await self.fetch_json(url)
         if data and 'lyrics' in data:
@@ -63,164 +216,265 @@ class MusicAPI:
         return None
 
     async def search_track(self, artist, title):
-        await self.create_session()
-        
+        return await self._lookup_track(artist, title) or None
+
+    async def _lookup_track(self, artist, title):
+        key = ('track', artist, title)
+        return await self._cached(key, TRACK_TTL, lambda: self._fetch_track(artist, title))
+
+    async def _fetch_track(self, artist, title):
+        query = f'recording:"{title}"'
+        if artist:
+            query = f'artist:"{artist}" AND {query}'
         params = {
-            'query': f'artist:"{artist}" AND recording:"{title}"',
+            'query': query,
             'fmt': 'json',
             'limit': 1
         }
         
         try:
-            async with self.session.get(
-                f"{self.base_url}recording/",
-                params=params
-            ) as response:
-                
-                if response.status == 200:
-                    data = await response.json()
-                    if data.get('recordings'):
-                        recording = data['recordings'][0]
-                        return await self._format_track(recording)
+            data = await self.fetch_json(f"{self.base_url}recording/", params)
+            if data is not None:
+                recordings = data.get('recordings')
+                return await self._format_track(recordings[0]) if recordings else False
                     
         except Exception as e:
-            logger.error(f"MusicBrainz search error: {e}")
+            logger.error("MusicBrainz search error: %s", e)
         
         return None
 
+    async def enrich_trending(self, trending):
+        return await asyncio.gather(
+            *(self._lookup_track(track['artist']['name'], track['title']) for track in trending),
+            return_exceptions=True
+        )
+
     async def _format_track(self, recording):
         album = "Unknown Album"
-        release_date = ""
-        if 'releases' in recording and recording['releases']:
-            release = recording['releases'][0]
+        releases = recording.get('releases')
+        if releases:
+            release = releases[0]
             album = release.get('title', album)
             if 'date' in release:
-                release_date = f" ({release['date']})"
+                album = f"{album} ({release['date']})"
         
-        artist = recording.get('artist-credit', [{}])[0].get('name', 'Unknown Artist')
+        artist = (recording.get('artist-credit') or _EMPTY_CREDIT)[0].get('name', 'Unknown Artist')
+        length = recording.get('length')
         
         return {
             'title': recording.get('title', 'Unknown Track'),
             'artist': artist,
-            'album': f"{album}{release_date}",
-            'duration': int(recording.get('length', 0)) // 1000, 
+            'album': album,
+            'duration': length // 1000 if length else 0,
             'url': f"https://musicbrainz.org/recording/{recording['id']}",
-            'tags': [tag['name'] for tag in recording.get('tags', [])[:3]]
+            'tags': [tag['name'] for tag in (recording.get('tags') or ())[:3]]
         }
     
     async def get_trending(self):
-        await self.create_session()
+        ttl = self._ttl(self.trending_url, 600)
+        return await self._cached('trending', ttl, self._fetch_trending) or []
+
+    async def _fetch_trending(self):
         try:
-            async with self.session.get(self.trending_url) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return data.get('tracks', {}).get('data', [])[:10] 
-        except Exception as e:
-            print(f"Trending error: {e}")
-        return []
+            data = await self.fetch_json(self.trending_url)
+            if data:
+                return data.get('tracks', {}).get('data', [])[:10] 
+        except Exception:
+            logger.exception("Trending error")
+        return None
 
     async def get_recommendations(self, genre):
-        await self.create_session()
+        ttl = self._ttl(self.lastfm_url, 1800)
+        return await self._cached(('rec', genre), ttl, lambda: self._fetch_recommendations(genre)) or []
+
+    async def _top_tracks(self, tag):
+        params = {
+            'method': 'tag.gettoptracks',
+            'tag': tag,
+            'api_key': os.getenv('LASTFM_API_KEY'),
+            'format': 'json',
+            'limit': 5
+        }
+        data = await self.fetch_json(self.lastfm_url, params)
+        if not data:
+            return None
+        if 'error' in data:
+            logger.warning("Last.fm error %s: %s", data['error'], data.get('message'))
+            return None
+        return data.get('tracks', {}).get('track', [])
+
+    async def _fetch_recommendations(self, genre):
         try:
-            params = {
-                'method': 'tag.gettoptracks',
-                'tag': genre,
-                'api_key': os.getenv('LASTFM_API_KEY'),
-                'format': 'json',
-                'limit': 5
-            }
-            async with self.session.get(self.lastfm_url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return [track['name'] for track in data.get('tracks', {}).get('track', [])]
-        except Exception as e:
-            print(f"Recommendations error: {e}")
-        return []
+            tracks = await self._top_tracks(genre)
+            if tracks is not None:
+                return [track['name'] for track in tracks]
+        except Exception:
+            logger.exception("Recommendations error")
+        return None
     
     async def get_mood_songs(self, mood):
-        await self.create_session()
+        ttl = self._ttl(self.lastfm_url, 1800)
+        return await self._cached(('mood', mood), ttl, lambda: self._fetch_mood_songs(mood)) or []
+
+    async def _fetch_mood_songs(self, mood):
         try:
-            params = {
-                'method': 'tag.gettoptracks',
-                'tag': mood,
-                'api_key': os.getenv('LASTFM_API_KEY'),
-                'format': 'json',
-                'limit': 5
-            }
-            async with self.session.get(self.lastfm_url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return [
-                        f"{track['name']} - {track['artist']['name']}" 
-                        for track in data.get('tracks', {}).get('track', [])
-                    ]
-        except Exception as e:
-            print(f"Mood songs error: {e}")
-        return []
+            tracks = await self._top_tracks(mood)
+            if tracks is not None:
+                return [f"{track['name']} - {track['artist']['name']}" for track in tracks]
+        except Exception:
+            logger.exception("Mood songs error")
+        return None
 
 music_api = MusicAPI()
 
-playlists = {}
+class PlaylistStore:
+    def __init__(self, path):
+        self.path = path
+        self.db = None
+
+    async def setup(self):
+        if self.db:
+            return
+        self.db = await aiosqlite.connect(self.path)
+        await self.db.execute("PRAGMA journal_mode=WAL")
+        await self.db.execute(
+            "CREATE TABLE IF NOT EXISTS playlist ("
+            "user_id TEXT, pos INTEGER, song TEXT, "
+            "PRIMARY KEY (user_id, pos), UNIQUE (user_id, song))"
+        )
+        await self.db.commit()
+
+    async def close(self):
+        if self.db:
+            await self.db.close()
+            self.db = None
+
+    async def add(self, user_id, song):
+        cursor = await self.db.execute(
+            "INSERT OR IGNORE INTO playlist (user_id, pos, song) "
+            "SELECT ?, COALESCE(MAX(pos), 0) + 1, ? FROM playlist WHERE user_id = ?",
+            (user_id, song, user_id)
+        )
+        await self.db.commit()
+        return cursor.rowcount > 0
+
+    async def remove(self, user_id, song):
+        cursor = await self.db.execute(
+            "DELETE FROM playlist WHERE user_id = ? AND song = ?",
+            (user_id, song)
+        )
+        await self.db.commit()
+        return cursor.rowcount > 0
+
+    async def clear(self, user_id):
+        await self.db.execute("DELETE FROM playlist WHERE user_id = ?", (user_id,))
+        await self.db.commit()
+
+    async def songs(self, user_id):
+        async with self.db.execute(
+            "SELECT song FROM playlist WHERE user_id = ? ORDER BY pos",
+            (user_id,)
+        ) as cursor:
+            return [row[0] for row in await cursor.fetchall()]
+
+playlist_store = PlaylistStore(os.getenv('PLAYLIST_DB', 'playlists.db'))
+
+embed_cache = OrderedDict()
+embed_builds = {}
+
+async def _build_embed(key, build):
+    embed_dict, ttl = await build()
+    embed_cache[key] = (time.monotonic() + ttl, embed_dict)
+    embed_cache.move_to_end(key)
+    if len(embed_cache) > CACHE_SIZE:
+        embed_cache.popitem(last=False)
+    return embed_dict
+
+def _embed_build_done(key, task):
+    embed_builds.pop(key, None)
+    if not task.cancelled() and task.exception():
+        logger.error("Embed build failed for %s", key[0], exc_info=task.exception())
+
+async def cached_embed(key, build, fallback=None):
+    entry = embed_cache.get(key)
+    if entry is not None:
+        embed_cache.move_to_end(key)
+        if time.monotonic() < entry[0]:
+            return discord.Embed.from_dict(entry[1])
+    
+    task = embed_builds.get(key)
+    if task is None:
+        task = asyncio.create_task(_build_embed(key, build))
+        embed_builds[key] = task
+        task.add_done_callback(lambda done: _embed_build_done(key, done))
+    
+    if fallback is not None:
+        # Answer now with the stale entry or the fallback; the build refreshes the cache.
+        return discord.Embed.from_dict(entry[1] if entry else fallback())
+    return discord.Embed.from_dict(await asyncio.shield(task))
+
+def trending_embed(entries, details=None):
+    details = details or (None,) * len(entries)
+    fields = []
+    for i, ((title, artist), info) in enumerate(zip(entries, details), 1): 
+        value = f"by {artist}"
+        if isinstance(info, dict):
+            value += f" · [{info['album']}]({info['url']})"
+        fields.append({'name': f"{i}. {title}", 'value': value, 'inline': False})
+    
+    return {
+        'title': "Currently Trending",
+        'color': discord.Color.gold().value,
+        'fields': fields,
+        'footer': {'text': "Use /lyrics to get lyrics for any of these songs"}
+    }
+
+def numbered_fields(items):
+    return [{'name': f"{i}.", 'value': item, 'inline': False} for i, item in enumerate(items, 1)]
 
 @bot.event
 async def on_ready():
-    print(f'{bot.user} has connected to Discord!')
-    await bot.change_presence(activity=discord.Game(name="/help for commands"))
+    logger.info("%s has connected to Discord!", bot.user)
+    await bot.change_presence(activity=discord.Game(name="/lyrics, /track, /trending"))
 
-@bot.command(name='lyrics')
-async def lyrics_command(ctx, *, query):
-    await ctx.send(f"Searching lyrics for: **{query}**...")
-    
-    separators = [' by ', ' - ', ' | ']
-    artist, title = None, None
-    
-    for sep in separators:
-        if sep in query:
-            parts = query.split(sep, 1)
-            title = parts[0].strip()
-            artist = parts[1].strip()
-            break
+@bot.tree.command(name='lyrics', description="Get the lyrics for a song")
+@app_commands.describe(song="Song title", artist="Artist name (looked up when omitted)")
+async def lyrics_command(interaction: discord.Interaction, song: str, artist: Optional[str] = None):
+    await interaction.response.defer(thinking=True)
+    title = song
     
     if not artist:
-        track_info = await music_api.search_track(query)
+        track_info = await music_api.search_track(None, song)
         if track_info:
             artist = track_info['artist']
             title = track_info['title']
         else:
-            await ctx.send("Please specify both song and artist (e.g., `/lyrics Hello - Adele`)")
+            await interaction.followup.send("Couldn't identify that song, please specify the artist too.")
             return
     
-    artist = artist.split(' ft.')[0].split(' feat.')[0].strip()
-    title = title.split(' (')[0].strip()
+    artist = FEAT_RE.sub('', artist).strip()
+    title = PAREN_RE.sub('', title).strip()
     
-    logger.info(f"Processed request - Artist: {artist}, Title: {title}")
+    logger.info("Processed request - Artist: %s, Title: %s", artist, title)
     
     lyrics = await music_api.get_lyrics(artist, title)
     if not lyrics:
-        await ctx.send(f"Couldn't find lyrics for {title} by {artist}")
-        return
-    
-    chunks = [lyrics[i:i+1900] for i in range(0, min(len(lyrics), 5700), 1900)] 
-    for chunk in chunks:
-        await ctx.send(f"```\n{chunk}\n```")
-    if len(lyrics) > 5700:
-        await ctx.send("Lyrics truncated due to length...")
-
-@bot.command(name='track')
-async def track_info(ctx, *, query):
-    parts = query.split(' - ', 1) if ' - ' in query else query.split(' by ', 1)
-    title = parts[0].strip()
-    artist = parts[1].strip() if len(parts) > 1 else None
-    
-    if not artist:
-        await ctx.send("Please specify both song and artist (e.g. `/track Hello - Adele`)")
+        await interaction.followup.send(f"Couldn't find lyrics for {title} by {artist}")
         return
     
-    await ctx.send(f"Searching for {title} by {artist}...")
-    
-    track_info = await music_api.search_track(artist, title)
+    end = min(len(lyrics), 5700)
+    for i in range(0, end, 1900):
+        await interaction.followup.send(LYRICS_BLOCK.format(lyrics[i:i+1900]))
+    if end < len(lyrics):
+        await interaction.followup.send("Lyrics truncated due to length...")
+
+@bot.tree.command(name='track', description="Show details about a track")
+@app_commands.describe(song="Song title", artist="Artist name")
+async def track_info(interaction: discord.Interaction, song: str, artist: str):
+    await interaction.response.defer(thinking=True)
+    track_info = await music_api.search_track(artist, song)
     if not track_info:
-        await ctx.send("Couldn't find track information")
+        await interaction.followup.send("Couldn't find track information")
         return
     
     embed = discord.Embed(
@@ -240,131 +494,124 @@ async def track_info(ctx, *, query):
         embed.add_field(name="Tags", value=", ".join(track_info['tags']), inline=False)
     
     
-    await ctx.send(embed=embed)
+    await interaction.followup.send(embed=embed)
 
-@bot.command(name='trending')
-async def trending_command(ctx):
-    await ctx.send("Fetching trending tracks...")
-    
+@bot.tree.command(name='trending', description="Show the currently trending tracks")
+async def trending_command(interaction: discord.Interaction):
+    await interaction.response.defer(thinking=True)
     trending = await music_api.get_trending()
     if not trending:
-        await ctx.send("Couldn't fetch trending tracks at the moment.")
+        await interaction.followup.send("Couldn't fetch trending tracks at the moment.")
         return
     
-    embed = discord.Embed(
-        title="Currently Trending",
-        color=discord.Color.gold(),
-        timestamp=datetime.utcnow()
-    )
+    entries = tuple((track['title'], track['artist']['name']) for track in trending[:10])
     
-    for i, track in enumerate(trending[:10], 1): 
-        artist = track['artist']['name']
-        title = track['title']
-        embed.add_field(
-            name=f"{i}. {title}",
-            value=f"by {artist}",
-            inline=False
-        )
+    async def build():
+        details = await music_api.enrich_trending(trending[:10])
+        # Unmatched tracks are cached as False; retry later only if a lookup failed.
+        complete = all(info is False or isinstance(info, dict) for info in details)
+        return trending_embed(entries, details), float('inf') if complete else PARTIAL_EMBED_TTL
     
-    embed.set_footer(text="Use /lyrics to get lyrics for any of these songs")
-    await ctx.send(embed=embed)
+    embed = await cached_embed(('trending', entries), build, fallback=lambda: trending_embed(entries))
+    embed.timestamp = datetime.utcnow()
+    await interaction.followup.send(embed=embed)
 
-@bot.command(name='recommend')
-async def recommend_command(ctx, *, genre):
-    await ctx.send(f"Getting {genre} recommendations...")
-    
+@bot.tree.command(name='recommend', description="Recommend songs from a genre")
+@app_commands.describe(genre="Genre, e.g. pop, rock, hiphop")
+async def recommend_command(interaction: discord.Interaction, genre: str):
+    await interaction.response.defer(thinking=True)
     recommendations = await music_api.get_recommendations(genre.lower())
     if not recommendations:
-        await ctx.send(f"No recommendations found for {genre}. Try pop, rock, hiphop, etc.")
+        await interaction.followup.send(f"No recommendations found for {genre}. Try pop, rock, hiphop, etc.")
         return
     
-    embed = discord.Embed(
-        title=f"🎵 {genre.title()} Recommendations",
-        color=discord.Color.green()
-    )
-    
-    for i, track in enumerate(recommendations, 1):
-        embed.add_field(name=f"{i}.", value=track, inline=False)
+    async def build():
+        return {
+            'title': f"🎵 {genre.title()} Recommendations",
+            'color': discord.Color.green().value,
+            'fields': numbered_fields(recommendations)
+        }, float('inf')
     
-    await ctx.send(embed=embed)
+    embed = await cached_embed(('rec', genre.title(), tuple(recommendations)), build)
+    await interaction.followup.send(embed=embed)
 
-@bot.command(name='mood')
-async def mood_command(ctx, *, mood):
-    await ctx.send(f"Finding {mood} songs...")
-    
+@bot.tree.command(name='mood', description="Find songs for a mood")
+@app_commands.describe(mood="Mood, e.g. happy, sad, chill")
+async def mood_command(interaction: discord.Interaction, mood: str):
+    await interaction.response.defer(thinking=True)
     mood_songs = await music_api.get_mood_songs(mood.lower())
     if not mood_songs:
         common_moods = ["happy", "sad", "chill", "energetic", "romantic"]
-        await ctx.send(f"No songs found for {mood}. Try: {', '.join(common_moods)}")
+        await interaction.followup.send(f"No songs found for {mood}. Try: {', '.join(common_moods)}")
         return
     
-    embed = discord.Embed(
-        title=f"🎧 {mood.title()} Mood Songs",
-        color=discord.Color.purple()
-    )
-    
-    for i, song in enumerate(mood_songs, 1):
-        embed.add_field(name=f"{i}.", value=song, inline=False)
+    async def build():
+        return {
+            'title': f"🎧 {mood.title()} Mood Songs",
+            'color': discord.Color.purple().value,
+            'fields': numbered_fields(mood_songs)
+        }, float('inf')
     
-    await ctx.send(embed=embed)
+    embed = await cached_embed(('mood', mood.title(), tuple(mood_songs)), build)
+    await interaction.followup.send(embed=embed)
 
-@bot.command(name='playlist')
-async def playlist_command(ctx, action=None, *, song=None):
-    user_id = str(ctx.author.id)
-    
-    if user_id not in playlists:
-        playlists[user_id] = []
+@bot.tree.command(name='playlist', description="Manage your personal playlist")
+@app_commands.describe(action="What to do with your playlist", song="Song for add/remove")
+async def playlist_command(
+    interaction: discord.Interaction,
+    action: Literal['view', 'add', 'remove', 'clear'] = 'view',
+    song: Optional[str] = None
+):
+    send = interaction.response.send_message
+    user_id = str(interaction.user.id)
     
     if action == 'add' and song:
-        playlists[user_id].append(song)
-        await ctx.send(f"Added '{song}' to your playlist!")
+        if await playlist_store.add(user_id, song):
+            await send(f"Added '{song}' to your playlist!")
+        else:
+            await send(f"'{song}' is already in your playlist!")
         
     elif action == 'remove' and song:
-        if song in playlists[user_id]:
-            playlists[user_id].remove(song)
-            await ctx.send(f"Removed '{song}' from your playlist!")
+        if await playlist_store.remove(user_id, song):
+            await send(f"Removed '{song}' from your playlist!")
         else:
-            await ctx.send(f"'{song}' not found in your playlist!")
+            await send(f"'{song}' not found in your playlist!")
             
     elif action == 'clear':
-        playlists[user_id] = []
-        await ctx.send("Your playlist has been cleared!")
+        await playlist_store.clear(user_id)
+        await send("Your playlist has been cleared!")
         
-    elif action == 'view' or action is None:
-        if playlists[user_id]:
-            embed = discord.Embed(
-                title=f"🎶 {ctx.author.name}'s Playlist",
-                color=discord.Color.blurple()
-            )
-            for i, item in enumerate(playlists[user_id], 1):
-                embed.add_field(name=f"{i}.", value=item, inline=False)
-            await ctx.send(embed=embed)
+    elif action == 'view':
+        songs = await playlist_store.songs(user_id)
+        if songs:
+            embed = discord.Embed.from_dict({
+                'title': f"🎶 {interaction.user.name}'s Playlist",
+                'color': discord.Color.blurple().value,
+                'fields': numbered_fields(songs)
+            })
+            await send(embed=embed)
         else:
-            await ctx.send("Your playlist is empty! Use `/playlist add <song>` to add songs.")
+            await send("Your playlist is empty! Use `/playlist add <song>` to add songs.")
             
     else:
-        await ctx.send(
-            "Usage: `/playlist [add/remove/view/clear] [song]`\n"
-            "Examples:\n"
-            "`/playlist add AntiHero`\n"
-            "`/playlist view`\n"
-            "`/playlist remove AntiHero`\n"
-            "`/playlist clear`"
+        await send(
+            f"`/playlist {action}` needs a song, e.g. `/playlist {action} AntiHero`",
+            ephemeral=True
         )
 
-@bot.event
-async def on_command_error(ctx, error):
-    if isinstance(error, commands.CommandNotFound):
-        await ctx.send("Command not found! Use `/help` to see available commands.")
-    elif isinstance(error, commands.MissingRequiredArgument):
-        await ctx.send("Missing required argument! Check `/help` for command usage.")
+@bot.tree.error
+async def on_app_command_error(interaction, error):
+    logger.error(
+        "Command %s failed: %s",
+        interaction.command and interaction.command.name,
+        error,
+        exc_info=error
+    )
+    message = f"An error occurred: {str(error)}"
+    if interaction.response.is_done():
+        await interaction.followup.send(message, ephemeral=True)
     else:
-        await ctx.send(f"An error occurred: {str(error)}")
-
-
-@bot.event
-async def on_disconnect():
-    await music_api.close_session()
+        await interaction.response.send_message(message, ephemeral=True)
 
 
 if __name__ == "__main__":
@@ -372,4 +619,7 @@ if __name__ == "__main__":
     if not TOKEN:
         logger.error("Error: DISCORD_BOT_TOKEN not found in .env file!")
     else:
+        metrics_port = os.getenv('METRICS_PORT')
+        if REQUEST_LATENCY and metrics_port:
+            start_http_server(int(metrics_port))
         bot.run(TOKEN)